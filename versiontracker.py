@@ -6,11 +6,12 @@ import json
 import logging
 import os
 import re
+import subprocess
 import sys
 import textwrap
 import time
-
-from fuzzywuzzy.fuzz import partial_ratio
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 
 # from ast import arguments
 
@@ -20,21 +21,27 @@ from fuzzywuzzy.fuzz import partial_ratio
 VERSION = "0.1.0"
 
 SYSTEM_PROFILER_CMD = '/usr/sbin/system_profiler -json SPApplicationsDataType'
-DESIRED_PATHS = ('/Applications/')  # desired paths for app filtering tuple
+DESIRED_PATHS = ('/Applications/',)  # desired paths for app filtering tuple
+# system_profiler 'obtained_from' values for apps updated by Apple/App Store
+EXCLUDED_SOURCES = frozenset(('apple', 'mac_app_store'))
 
 BREW_CMD = '/usr/local/bin/brew list --casks'
 BREW_SEARCH = '/usr/local/bin/brew search'
 SLOWDOWN_BREW_SEARCH = 3  # wait seconds for GitHub HOMEBREW search API
 
+DIGITS_RE = re.compile(r'\d+')  # numbers stripped from app names
+
 # Logging: logging.NOTSET, logging.DEBUG, logging.INFO, logging.WARNING,
 # logging.ERROR, logging.CRITICAL,
 # https://docs.python.org/3/library/logging.html
 # TODO: Change locations of logfiles ie. '~/Library/Logs/Versiontracker'
 LOG_LEVEL = logging.DEBUG
 
-logging.basicConfig(filename='versiontracker.log',
-                    format='%(asctime)s %(levelname)s %(name)s %(message)s',
-                    encoding='utf-8', filemode='w', level=LOG_LEVEL)
+
+class Application(NamedTuple):
+    """An application in Applications/ and its version."""
+    name: str
+    version: str
 
 
 # TODO: shorten cli options
@@ -82,16 +89,26 @@ def get_arguments() -> dict:
 def normalise_name(name: str) -> str:
     """Returns a normalised string."""
     name = name.strip()  # removing whitespace
-    name = re.sub(r'\d+', '', name)  # get rid of numbers in name
+    name = DIGITS_RE.sub('', name)  # get rid of numbers in name
     if not name.isprintable():  # remove non printables
         name = ''.join(c for c in name if c.isprintable())
     return name
 
+
+def get_system_profiler_data() -> 'json':
+    """Returns the parsed system_profiler output.
+
+    Reads the output as bytes without a shell; json.loads decodes UTF-8 itself."""
+    output = subprocess.run(SYSTEM_PROFILER_CMD.split(),
+                            stdout=subprocess.PIPE, check=False).stdout
+    return json.loads(output)
+
+
 # TODO: Add custom type hint JSON
 
 
-def get_applications(data: 'json') -> tuple:
-    """Returns a tuple (app_name, version)
+def get_applications(data: 'json') -> list:
+    """Returns a list of Application(name, version)
 
     Args:
         DESIRED_PATHS (tuple): search paths
@@ -101,70 +118,89 @@ def get_applications(data: 'json') -> tuple:
     apps = []
     for app in data['SPApplicationsDataType']:
         if (app['path'].startswith(DESIRED_PATHS)
-            and 'apple' not in app['obtained_from']
-                and 'mac_app_store' not in app['obtained_from']):
+                and app['obtained_from'] not in EXCLUDED_SOURCES):
             try:
                 app_name = normalise_name(app['_name'])
                 app_version = app['version'].strip()
                 if app_name not in apps:
-                    apps.append([app_name, app_version])
+                    apps.append(Application(app_name, app_version))
                 logging.debug("\t%s %s", app_name.strip(), app_version)
             except KeyError:
-                apps.append([app_name, ''])
+                apps.append(Application(app_name, ''))
                 logging.info("\t%s,  KeyError: no version fixed!", app_name)
                 logging.debug("\t%s %s", app_name, '')
-    apps.sort(key=lambda apps: apps[0].casefold())
+    apps.sort(key=lambda app: app.name.casefold())
     return apps
 
 
-def filter_out_brews(applications: tuple, brews: list) -> tuple:
-    """Returns a tuple (app_name, version)
+def filter_out_brews(applications: list, brews: list) -> list:
+    """Returns a list of Application(name, version)
+
+    Finds installable application candidates with brew.
+
+    Args:
+        applications (list): Applications from get_applications
+        brews (list): installed brew casks
+    """
+    # fuzzywuzzy is only needed for --recommend - keep it off the startup path
+    from fuzzywuzzy.fuzz import partial_ratio  # pylint: disable=import-outside-toplevel
 
-    Finds installable application candidates with brew."""
     print("getting installable casks from HOMEBREW...")
-    candidates = []
     search_list = []
 
     for app in applications:
-        # app_name = normalise_name(app[0])
-        app_name = app[0].strip().lower()
-        candidates.extend(app[0]
-                          for brew in brews if partial_ratio(app_name, brew) > 75)  # Fussy compare
+        # app_name = normalise_name(app.name)
+        app_name = app.name.strip().lower()
+        # Fussy compare - stop at the first installed brew that matches
+        if not any(partial_ratio(app_name, brew) > 75 for brew in brews):
+            search_list.append(app)
 
-    search_list.extend(app for app in applications if app[0] not in candidates)
     # TODO: Remove duplicate entries based on the name with a list comprehension usining unpacking
 
-    search_list.sort(key=lambda item: item[0].casefold())
+    search_list.sort(key=lambda item: item.name.casefold())
     return search_list
 
 
-def check_brew_optional_install(data: tuple) -> list:
+def check_brew_optional_install(data: list) -> list:
     """Returns list of optional apps to be installed with brew
 
     Args:
-        data (list): list of optional installs with brew
+        data (list): Applications that are optional installs with brew
     """
+    from fuzzywuzzy.fuzz import partial_ratio  # pylint: disable=import-outside-toplevel
+
     print("filtering out installed brews from HOMEBREW casks...")
-    installers = []
+    installers = set()
+    last_search = None  # when the previous search finished
 
     for app in data:
-        brew_search = f"{BREW_SEARCH} '{app[0]}'"
-        if response := os.popen(brew_search).read().splitlines():
+        # pause between searches for the GitHub api - none after the last one
+        if last_search is not None:
+            wait = SLOWDOWN_BREW_SEARCH - (time.monotonic() - last_search)
+            if wait > 0:
+                print("waiting for GitHub api...")
+                time.sleep(wait)
+        brew_search = f"{BREW_SEARCH} '{app.name}'"
+        response = os.popen(brew_search).read().splitlines()
+        last_search = time.monotonic()
+        if response:
             response = [
                 item for item in response if item and '==>' not in item]
             # print(response)
             logging.debug("\tBREW SEARCH: %s", response)
-            installers.extend(
-                app[0] for brew in response if partial_ratio(app[0], brew) > 75)
+            if any(partial_ratio(app.name, brew) > 75 for brew in response):
+                installers.add(app.name)
             # DEBUG:
             # print(installers)
-        # DEBUG:
-        print("waiting for GitHub api...")
-        time.sleep(SLOWDOWN_BREW_SEARCH)
 
-    installers = list(set(installers))
-    installers.sort(key=str.casefold)
-    return installers
+    return sorted(installers, key=str.casefold)
+
+
+def print_lines(lines) -> None:
+    """Writes all lines to stdout with a single buffered write."""
+    output = '\n'.join(lines)
+    if output:
+        sys.stdout.write(output + '\n')
 
 
 def recommended_apps(options):
@@ -172,20 +208,29 @@ def recommended_apps(options):
     Args:
         options (dict): cli option
     """
-    raw_data = json.loads(os.popen(SYSTEM_PROFILER_CMD).read())
+    # system_profiler and brew are independent and I/O bound - run both at once
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        profiler_output = executor.submit(get_system_profiler_data)
+        brew_output = executor.submit(lambda: os.popen(BREW_CMD).read())
+        raw_data = profiler_output.result()
+        apps_homebrew = brew_output.result().splitlines()
     apps_folder = get_applications(raw_data)
-    apps_homebrew = os.popen(BREW_CMD).read().splitlines()
     search_brutto = filter_out_brews(apps_folder, apps_homebrew)
     brew_options = check_brew_optional_install(search_brutto)
-    for re_brew in brew_options:
-        if options.debug:
+    if options.debug:
+        for re_brew in brew_options:
             logging.debug("\t recommended install: %s", re_brew)
-        print(re_brew)
+    print_lines(brew_options)
 
 
 def main():
     """Returns a tuple or a list of recommended Apps"""
 
+    # configured here and not at import time, which would truncate the logfile
+    logging.basicConfig(filename='versiontracker.log',
+                        format='%(asctime)s %(levelname)s %(name)s %(message)s',
+                        encoding='utf-8', filemode='w', level=LOG_LEVEL)
+
     options = get_arguments()  # Get arguments
     # print(f'DEBUG: {vars(options)}')  # DEBUG: Print arguments
 
@@ -194,18 +239,16 @@ def main():
     #     LOG_LEVEL = logging.DEBUG
 
     if options.apps:
-        raw_data = json.loads(os.popen(SYSTEM_PROFILER_CMD).read())
+        raw_data = get_system_profiler_data()
         apps_folder = get_applications(raw_data)
-        for item in apps_folder:
-            app, ver = item
-            print(f"{app} - ({ver})")
+        print_lines(f"{app} - ({ver})" for app, ver in apps_folder)
 
     if options.brews:
         apps_homebrew = os.popen(BREW_CMD).read().splitlines()
-        for brew in apps_homebrew:
-            if options.debug:
+        if options.debug:
+            for brew in apps_homebrew:
                 logging.debug("\tbrew cask: %s", brew)
-            print(brew)
+        print_lines(apps_homebrew)
 
     if options.recom:
         recommended_apps(options)